@@ -44,3 +44,11 @@ IBN_INFO = 'ibn_template.txt'
 ISE_URL = 'https://Cisco ISE IP Address:9060'
 ISE_USER = 'username'
 ISE_PASS = 'password'
+
+# Optional, for fleets spread across several Cisco DNA Center clusters and ISE deployments:
+# file with the info for each controller, and the sites and switches managed by each one.
+# Copy {controllers_template.txt} to this file and update it, the info above is used if this file does not exist
+CONTROLLERS_INFO = 'controllers.txt'
+CONTROLLER_POOL_SIZE = 10
+
+TASK_TIMEOUT = 600  # seconds, max time to wait for a Cisco DNA Center task or template deployment to complete
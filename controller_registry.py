@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+
+
+Copyright (c) 2019 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2019 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import requests
+import urllib3
+import json
+import threading
+import dnac_apis
+
+
+from collections import OrderedDict
+from urllib3.exceptions import InsecureRequestWarning  # for insecure https warnings
+from requests.auth import HTTPBasicAuth  # for Basic Auth
+from requests.adapters import HTTPAdapter
+
+from config import DNAC_URL, DNAC_PASS, DNAC_USER
+from config import ISE_URL, ISE_USER, ISE_PASS
+from config import CONTROLLERS_INFO, CONTROLLER_POOL_SIZE
+
+urllib3.disable_warnings(InsecureRequestWarning)  # disable insecure https warnings
+
+
+class Controller(object):
+    """
+    One Cisco DNA Center cluster and the ISE deployment paired with it, with the auth info, the Cisco DNA Center token
+    and one requests session, holding the connection pool used for all the calls to this controller
+    """
+
+    def __init__(self, name, dnac_url, dnac_user, dnac_pass, ise_url, ise_user, ise_pass, sites=(), switches=(),
+                 pool_size=CONTROLLER_POOL_SIZE):
+        """
+        :param name: controller name
+        :param dnac_url: Cisco DNA Center URL
+        :param dnac_user: Cisco DNA Center username
+        :param dnac_pass: Cisco DNA Center password
+        :param ise_url: ISE URL
+        :param ise_user: ISE username
+        :param ise_pass: ISE password
+        :param sites: names of the sites managed by this controller
+        :param switches: hostnames of the switches managed by this controller
+        :param pool_size: max number of connections kept open to each server
+        """
+        self.name = name
+        self.dnac_url = dnac_url
+        self.dnac_auth = HTTPBasicAuth(dnac_user, dnac_pass)
+        self.ise_url = ise_url
+        self.ise_auth = HTTPBasicAuth(ise_user, ise_pass)
+        self.sites = list(sites)
+        self.switches = list(switches)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.hooks['response'].append(self._refresh_on_401)
+        self._token = None
+        self._token_lock = threading.Lock()
+
+    def get_dnac_token(self, refresh=False, stale_token=None):
+        """
+        This method will return the Cisco DNA Center token for this controller, created at the first call
+        :param refresh: create a new token, if True
+        :param stale_token: create a new token only if the current token is {stale_token}, when refresh is True
+        :return: Cisco DNA Center token
+        """
+        with self._token_lock:
+            if self._token is None or (refresh and stale_token in (None, self._token)):
+                self._token = dnac_apis.get_dnac_jwt_token(self.dnac_auth, dnac_url=self.dnac_url,
+                                                           session=self.session)
+            return self._token
+
+    def _refresh_on_401(self, response, *args, **kwargs):
+        """
+        Session response hook, the Cisco DNA Center tokens expire after one hour. Create a new token when a request
+        is rejected with 401 Unauthorized, and send the request again, once, with the new token.
+        """
+        request_token = response.request.headers.get('x-auth-token')
+        if response.status_code != 401 or request_token is None:
+            return response
+        response.content  # read the 401 response, to release the connection back to the pool
+        response.close()
+        dnac_token = self.get_dnac_token(refresh=True, stale_token=request_token)
+        retry_request = response.request.copy()
+        retry_request.headers['x-auth-token'] = dnac_token
+        retry_request.hooks = {'response': []}  # no new retry if the new token is rejected too
+        return self.session.send(retry_request, **kwargs)
+
+    def close(self):
+        """
+        This method will close the connections to this controller
+        :return: None
+        """
+        self.session.close()
+
+
+class ControllerRegistry(object):
+    """
+    Map the switches and sites to the controller managing them.
+    The switch hostname is checked first, then the site, then the default controller.
+    """
+
+    def __init__(self, controllers=(), default=None):
+        """
+        :param controllers: list of controllers
+        :param default: name of the controller used for the switches and sites not mapped to any controller
+        """
+        self.controllers = OrderedDict()
+        self.default = default
+        self._switches = {}
+        self._sites = {}
+        for controller in controllers:
+            self.add(controller)
+
+    def add(self, controller):
+        """
+        This method will add the controller {controller}, and the switches and sites managed by it
+        :param controller: controller
+        :return: None
+        """
+        if controller.name in self.controllers:
+            raise ValueError('Duplicate controller name: ' + controller.name)
+        self.controllers[controller.name] = controller
+        for switch_name in controller.switches:
+            self._switches[switch_name.lower()] = controller
+        for site_name in controller.sites:
+            self._sites[site_name.lower()] = controller
+        if self.default is None:
+            self.default = controller.name
+
+    def get(self, name):
+        """
+        :param name: controller name
+        :return: the controller with the name {name}
+        """
+        return self.controllers[name]
+
+    def route(self, switch_name, site_name=None):
+        """
+        This method will find the controller managing the switch with the name {switch_name}
+        :param switch_name: switch hostname
+        :param site_name: site name, optional
+        :return: controller
+        """
+        controller = self._switches.get(str(switch_name).lower())
+        if controller is None and site_name is not None:
+            controller = self._sites.get(str(site_name).lower())
+        if controller is None and self.default is not None:
+            controller = self.controllers[self.default]
+        if controller is None:
+            raise LookupError('No controller found for the switch: ' + str(switch_name))
+        return controller
+
+    def route_intent(self, ibn_json):
+        """
+        This method will find the controller for the intent {ibn_json}, using the "switchName" and "location" values
+        :param ibn_json: intent info, same format as the IBN template
+        :return: controller
+        """
+        return self.route(ibn_json['switchName'], ibn_json.get('location'))
+
+    def close(self):
+        """
+        This method will close the connections to all controllers
+        :return: None
+        """
+        for controller in self.controllers.values():
+            controller.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_registry(file_name=CONTROLLERS_INFO):
+    """
+    This function will create the controller registry from the file with the name {file_name}
+    :param file_name: controllers info file, JSON format, same as {controllers_template.txt}
+    :return: controller registry
+    """
+    with open(file_name, 'r') as filehandle:
+        controllers_json = json.loads(filehandle.read())
+    registry = ControllerRegistry(default=controllers_json.get('default'))
+    for controller_info in controllers_json['controllers']:
+        registry.add(Controller(controller_info['name'],
+                                controller_info['dnacUrl'], controller_info['dnacUser'], controller_info['dnacPass'],
+                                controller_info['iseUrl'], controller_info['iseUser'], controller_info['isePass'],
+                                sites=controller_info.get('sites', []),
+                                switches=controller_info.get('switches', [])))
+    if registry.default is not None and registry.default not in registry.controllers:
+        raise ValueError('Default controller not found: ' + registry.default)
+    return registry
+
+
+def default_registry():
+    """
+    This function will create a controller registry with one controller, using the info from {config.py}
+    :return: controller registry
+    """
+    controller = Controller('default', DNAC_URL, DNAC_USER, DNAC_PASS, ISE_URL, ISE_USER, ISE_PASS)
+    return ControllerRegistry([controller], default=controller.name)
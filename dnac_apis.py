@@ -41,6 +41,7 @@ from requests.auth import HTTPBasicAuth  # for Basic Auth
 
 from config import DNAC_URL, DNAC_PASS, DNAC_USER
 from config import DNAC_PROJECT, DNAC_TEMPLATE, CLI_TEMPLATE, IBN_INFO
+from config import TASK_TIMEOUT
 
 urllib3.disable_warnings(InsecureRequestWarning)  # disable insecure https warnings
 
@@ -57,31 +58,35 @@ def pprint(json_data):
     print(json.dumps(json_data, indent=4, separators=(' , ', ' : ')))
 
 
-def get_dnac_jwt_token(dnac_auth):
+def get_dnac_jwt_token(dnac_auth, dnac_url=DNAC_URL, session=requests):
     """
     Create the authorization token required to access Cisco DNA Center
     Call to Cisco DNA Center - /api/system/v1/auth/login
     :param dnac_auth - Cisco DNA Center Basic Auth string
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return Cisco DNA Center Token
     """
-    url = DNAC_URL + '/dna/system/api/v1/auth/token'
+    url = dnac_url + '/dna/system/api/v1/auth/token'
     header = {'content-type': 'application/json'}
-    response = requests.post(url, auth=dnac_auth, headers=header, verify=False)
+    response = session.post(url, auth=dnac_auth, headers=header, verify=False)
     response_json = response.json()
     dnac_jwt_token = response_json['Token']
     return dnac_jwt_token
 
 
-def get_project_by_name(project_name, dnac_jwt_token):
+def get_project_by_name(project_name, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     This function will retrieve details about the project with the name {project_name}, if existing
     :param project_name: Cisco DNA Center project name
     :param danc_jwt_token: Cisco DNA Center Token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return: Cisco DNA Center project id, or '' if not existing
     """
-    url = DNAC_URL + '/dna/intent/api/v1/template-programmer/project?name=' + project_name
+    url = dnac_url + '/dna/intent/api/v1/template-programmer/project?name=' + project_name
     header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-    project_response = requests.get(url, headers=header, verify=False)
+    project_response = session.get(url, headers=header, verify=False)
     project_json = project_response.json()
     if not project_json:
         return ''
@@ -89,25 +94,27 @@ def get_project_by_name(project_name, dnac_jwt_token):
         return project_json[0]['id']
 
 
-def create_project(project_name, dnac_jwt_token):
+def create_project(project_name, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     This function will identify if the project with the name {project_name} exists and return the project_id.
     If project does not exist, create new project and return the project_id.
     :param Cisco DNA Center project name
     :param dnac_jwt_token: Cisco DNA Center Token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return: project _id
     """
-    project_id = get_project_by_name(project_name, dnac_jwt_token)
+    project_id = get_project_by_name(project_name, dnac_jwt_token, dnac_url=dnac_url, session=session)
     if project_id == '':
-        url = DNAC_URL + '/dna/intent/api/v1/template-programmer/project'
+        url = dnac_url + '/dna/intent/api/v1/template-programmer/project'
         param = {'name': project_name}
         header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-        project_response = requests.post(url, data=json.dumps(param), headers=header, verify=False)
+        project_response = session.post(url, data=json.dumps(param), headers=header, verify=False)
         project_json = project_response.json()['response']
         task_id = project_json['taskId']
 
         # check for when the task is completed
-        task_output = check_task_id_output(task_id, dnac_jwt_token)
+        task_output = check_task_id_output(task_id, dnac_jwt_token, dnac_url=dnac_url, session=session)
         if task_output['isError'] is True:
             print('\nCreating project ' + project_name + ' failed')
             return 'ProjectError'
@@ -117,37 +124,83 @@ def create_project(project_name, dnac_jwt_token):
         return project_id
 
 
-def check_task_id_output(task_id, dnac_jwt_token):
+def check_task_id_output(task_id, dnac_jwt_token, timeout=TASK_TIMEOUT,
+                         dnac_url=DNAC_URL, session=requests):
     """
     This function will check the status of the task with the id {task_id}. Loop one seconds increments until task is completed
     :param task_id: task id
     :param dnac_jwt_token: Cisco DNA Center token
-    :return: status - {SUCCESS} or {FAILURE}
+    :param timeout: max time to wait for the task to complete, in seconds
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
+    :return: task info, when the task is completed
+    """
+    deadline = time.time() + timeout
+    task_output = get_task_by_id(task_id, dnac_jwt_token, dnac_url=dnac_url, session=session)
+    while not is_task_completed(task_output):
+        if time.time() >= deadline:
+            raise TimeoutError('Task ' + task_id + ' not completed after ' + str(timeout) + ' seconds')
+        time.sleep(1)  # wait only while the task is still running
+        task_output = get_task_by_id(task_id, dnac_jwt_token, dnac_url=dnac_url, session=session)
+    return task_output
+
+
+def get_task_by_id(task_id, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
-    url = DNAC_URL + '/dna/intent/api/v1/task/' + task_id
+    This function will retrieve the details for the task with the id {task_id}
+    :param task_id: task id
+    :param dnac_jwt_token: Cisco DNA Center token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
+    :return: task info
+    """
+    url = dnac_url + '/dna/intent/api/v1/task/' + task_id
     header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-    completed = 'no'
-    while completed == 'no':
-        try:
-            task_response = requests.get(url, headers=header, verify=False)
-            task_json = task_response.json()
-            task_output = task_json['response']
-            completed = 'yes'
-        finally:
-            time.sleep(1)
-    return task_output
+    task_response = session.get(url, headers=header, verify=False)
+    task_json = task_response.json()
+    return task_json['response']
+
+
+def get_task_list(start_time, dnac_jwt_token, offset=1, limit=500, dnac_url=DNAC_URL, session=requests):
+    """
+    This function will retrieve the tasks started after the time {start_time}, with one request for up to {limit} tasks
+    :param start_time: epoch time in milliseconds
+    :param dnac_jwt_token: Cisco DNA Center token
+    :param offset: index of the first task to return, starting at 1
+    :param limit: max number of tasks to return
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
+    :return: list of tasks info
+    """
+    url = dnac_url + '/dna/intent/api/v1/task?startTime=' + str(int(start_time)) + '&offset=' + str(offset)
+    url += '&limit=' + str(limit)
+    header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
+    task_response = session.get(url, headers=header, verify=False)
+    task_json = task_response.json()
+    return task_json['response']
 
 
-def get_template_id(template_name, project_name, dnac_jwt_token):
+def is_task_completed(task_output):
+    """
+    This function will check if the task with the info {task_output} completed, successfully or with errors
+    :param task_output: task info
+    :return: True if completed, False if still running
+    """
+    return task_output.get('isError') is True or 'endTime' in task_output
+
+
+def get_template_id(template_name, project_name, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     This function will return the latest version template id for the DNA C template with the name {template_name},
     part of the project with the name {project_name}
     :param template_name: name of the template
     :param project_name: Project name
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return: DNA C template id
     """
-    template_list = get_project_info(project_name, dnac_jwt_token)
+    template_list = get_project_info(project_name, dnac_jwt_token, dnac_url=dnac_url, session=session)
     template_id = None
     for template in template_list:
         if template['name'] == template_name:
@@ -155,22 +208,25 @@ def get_template_id(template_name, project_name, dnac_jwt_token):
     return template_id
 
 
-def get_project_info(project_name, dnac_jwt_token):
+def get_project_info(project_name, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     This function will retrieve all templates associated with the project with the name {project_name}
     :param project_name: project name
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return: list of all templates, including names and ids
     """
-    url = DNAC_URL + '/dna/intent/api/v1/template-programmer/project?name=' + project_name
+    url = dnac_url + '/dna/intent/api/v1/template-programmer/project?name=' + project_name
     header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-    response = requests.get(url, headers=header, verify=False)
+    response = session.get(url, headers=header, verify=False)
     project_json = response.json()
     template_list = project_json[0]['templates']
     return template_list
 
 
-def create_commit_template(template_name, project_name, cli_template, dnac_jwt_token):
+def create_commit_template(template_name, project_name, cli_template, dnac_jwt_token,
+                           dnac_url=DNAC_URL, session=requests):
     """
     This function will create and commit a CLI template, under the project with the name {project_name}, with the the text content
     {cli_template}
@@ -178,9 +234,11 @@ def create_commit_template(template_name, project_name, cli_template, dnac_jwt_t
     :param project_name: Project name
     :param cli_template: CLI template text content
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return:
     """
-    project_id = get_project_by_name(project_name, dnac_jwt_token)
+    project_id = get_project_by_name(project_name, dnac_jwt_token, dnac_url=dnac_url, session=session)
 
     # prepare the template param to send to DNA C
     payload = {
@@ -216,61 +274,67 @@ def create_commit_template(template_name, project_name, cli_template, dnac_jwt_t
         }
 
     # check and delete older versions of the template
-    template_id = get_template_id(template_name, project_name, dnac_jwt_token)
+    template_id = get_template_id(template_name, project_name, dnac_jwt_token, dnac_url=dnac_url, session=session)
 
     if template_id:
-        delete_template(template_name, project_name, dnac_jwt_token)
+        delete_template(template_name, project_name, dnac_jwt_token, dnac_url=dnac_url, session=session)
 
     time.sleep(5)  # wait for 5 seconds for the existing template (if any) to be deleted
 
     # create the new template
-    url = DNAC_URL + '/dna/intent/api/v1/template-programmer/project/' + project_id + '/template'
+    url = dnac_url + '/dna/intent/api/v1/template-programmer/project/' + project_id + '/template'
     header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-    response = requests.post(url, data=json.dumps(payload), headers=header, verify=False)
+    response = session.post(url, data=json.dumps(payload), headers=header, verify=False)
 
     time.sleep(5)  # wait for 5 seconds for template to be created
     # get the template id
-    template_id = get_template_id(template_name, project_name, dnac_jwt_token)
+    template_id = get_template_id(template_name, project_name, dnac_jwt_token, dnac_url=dnac_url, session=session)
 
     # commit template
-    response = commit_template(template_id, 'committed by Python script', dnac_jwt_token)
+    response = commit_template(template_id, 'committed by Python script', dnac_jwt_token,
+                               dnac_url=dnac_url, session=session)
     return response
 
 
-def commit_template(template_id, comments, dnac_jwt_token):
+def commit_template(template_id, comments, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     This function will commit the template with the template id {template_id}
     :param template_id: template id
     :param comments: text with comments
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return:
     """
-    url = DNAC_URL + '/dna/intent/api/v1/template-programmer/template/version'
+    url = dnac_url + '/dna/intent/api/v1/template-programmer/template/version'
     payload = {
             "templateId": template_id,
             "comments": comments
         }
     header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-    response = requests.post(url, data=json.dumps(payload), headers=header, verify=False)
+    response = session.post(url, data=json.dumps(payload), headers=header, verify=False)
     return response
 
 
-def delete_template(template_name, project_name, dnac_jwt_token):
+def delete_template(template_name, project_name, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     This function will delete the template with the name {template_name}
     :param template_name: template name
     :param project_name: Project name
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return:
     """
-    template_id = get_template_id(template_name, project_name, dnac_jwt_token)
-    url = DNAC_URL + '/dna/intent/api/v1/template-programmer/template/' + template_id
+    template_id = get_template_id(template_name, project_name, dnac_jwt_token, dnac_url=dnac_url, session=session)
+    url = dnac_url + '/dna/intent/api/v1/template-programmer/template/' + template_id
     header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-    response = requests.delete(url, headers=header, verify=False)
+    response = session.delete(url, headers=header, verify=False)
     return response
 
 
-def deploy_template(template_name, project_name, device_name, params, dnac_jwt_token):
+def deploy_template(template_name, project_name, device_name, params, dnac_jwt_token,
+                    dnac_url=DNAC_URL, session=requests):
     """
     This function will deploy the template with the name {template_name} to the network device with the name
     {device_name}
@@ -279,9 +343,27 @@ def deploy_template(template_name, project_name, device_name, params, dnac_jwt_t
     :param device_name: device hostname
     :param params: parameters required for the deployment of template, format dict
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
+    :return: the deployment task id
+    """
+    template_id = get_template_id_version(template_name, project_name, dnac_jwt_token,
+                                          dnac_url=dnac_url, session=session)
+    return deploy_template_id(template_id, device_name, params, dnac_jwt_token, dnac_url=dnac_url, session=session)
+
+
+def deploy_template_id(template_id, device_name, params, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
+    """
+    This function will deploy the template version with the id {template_id} to the network device with the name
+    {device_name}
+    :param template_id: template version id, from {get_template_id_version}
+    :param device_name: device hostname
+    :param params: parameters required for the deployment of template, format dict
+    :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return: the deployment task id
     """
-    template_id = get_template_id_version(template_name, project_name, dnac_jwt_token)
     payload = {
             "templateId": template_id,
             "targetInfo": [
@@ -292,69 +374,86 @@ def deploy_template(template_name, project_name, device_name, params, dnac_jwt_t
                 }
             ]
         }
-    url = DNAC_URL + '/dna/intent/api/v1/template-programmer/template/deploy'
+    url = dnac_url + '/dna/intent/api/v1/template-programmer/template/deploy'
     header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-    response = requests.post(url, headers=header, data=json.dumps(payload), verify=False)
+    response = session.post(url, headers=header, data=json.dumps(payload), verify=False)
     depl_task_id = (response.json())["deploymentId"].split(' ')[-1]
     return depl_task_id
 
 
-def check_template_deployment_status(depl_task_id, dnac_jwt_token):
+def check_template_deployment_status(depl_task_id, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     This function will check the result for the deployment of the CLI template with the id {depl_task_id}
     :param depl_task_id: template deployment id
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return: status - {SUCCESS} or {FAILURE}
     """
-    url = DNAC_URL + '/dna/intent/api/v1/template-programmer/template/deploy/status/' + depl_task_id
+    url = dnac_url + '/dna/intent/api/v1/template-programmer/template/deploy/status/' + depl_task_id
     header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-    response = requests.get(url, headers=header, verify=False)
+    response = session.get(url, headers=header, verify=False)
     response_json = response.json()
     deployment_status = response_json["status"]
     return deployment_status
 
 
-def get_device_management_ip(device_name, dnac_jwt_token):
+def is_deployment_completed(deployment_status):
+    """
+    This function will check if the template deployment with the status {deployment_status} completed
+    :param deployment_status: template deployment status
+    :return: True if completed, False if still running
+    """
+    return deployment_status not in ('INIT', 'IN_PROGRESS')
+
+
+def get_device_management_ip(device_name, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     This function will find out the management IP address for the device with the name {device_name}
     :param device_name: device name
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return: the management ip address
     """
     device_ip = None
-    device_list = get_all_device_info(dnac_jwt_token)
+    device_list = get_all_device_info(dnac_jwt_token, dnac_url=dnac_url, session=session)
     for device in device_list:
         if device['hostname'] == device_name:
             device_ip = device['managementIpAddress']
     return device_ip
 
 
-def get_all_device_info(dnac_jwt_token):
+def get_all_device_info(dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     The function will return all network devices info
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return: DNA C device inventory info
     """
-    url = DNAC_URL + '/dna/intent/api/v1/network-device'
+    url = dnac_url + '/dna/intent/api/v1/network-device'
     header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-    all_device_response = requests.get(url, headers=header, verify=False)
+    all_device_response = session.get(url, headers=header, verify=False)
     all_device_info = all_device_response.json()
     return all_device_info['response']
 
 
-def get_template_id_version(template_name, project_name, dnac_jwt_token):
+def get_template_id_version(template_name, project_name, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     This function will return the latest version template id for the DNA C template with the name {template_name},
     part of the project with the name {project_name}
     :param template_name: name of the template
     :param project_name: Project name
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return: DNA C template id for the last version
     """
-    project_id = get_project_by_name(project_name, dnac_jwt_token)
-    url = DNAC_URL + '/dna/intent/api/v1/template-programmer/template?projectId=' + project_id + '&includeHead=false'
+    project_id = get_project_by_name(project_name, dnac_jwt_token, dnac_url=dnac_url, session=session)
+    url = dnac_url + '/dna/intent/api/v1/template-programmer/template?projectId=' + project_id + '&includeHead=false'
     header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-    response = requests.get(url, headers=header, verify=False)
+    response = session.get(url, headers=header, verify=False)
     project_json = response.json()
     for template in project_json:
         if template['name'] == template_name:
@@ -367,34 +466,46 @@ def get_template_id_version(template_name, project_name, dnac_jwt_token):
     return template_id_ver
 
 
-def sync_device(device_name, dnac_jwt_token):
+def sync_device(device_name, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     This function will sync the device configuration from the device with the name {device_name}
     :param device_name: device hostname
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
+    :return: the response status code, 202 if sync initiated, and the task id
+    """
+    device_id = get_device_id_name(device_name, dnac_jwt_token, dnac_url=dnac_url, session=session)
+    return sync_devices([device_id], dnac_jwt_token, dnac_url=dnac_url, session=session)
+
+
+def sync_devices(device_ids, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
+    """
+    This function will sync the device configuration from all the devices with the ids {device_ids}, with one request
+    :param device_ids: list of device ids
+    :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return: the response status code, 202 if sync initiated, and the task id
     """
-    device_id = get_device_id_name(device_name, dnac_jwt_token)
-    param = [device_id]
-    url = DNAC_URL + '/dna/intent/api/v1/network-device/sync?forceSync=true'
+    param = list(device_ids)
+    url = dnac_url + '/dna/intent/api/v1/network-device/sync?forceSync=true'
     header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-    sync_response = requests.put(url, data=json.dumps(param), headers=header, verify=False)
+    sync_response = session.put(url, data=json.dumps(param), headers=header, verify=False)
     task_id = sync_response.json()['response']['taskId']
     return sync_response.status_code, task_id
 
 
-def check_task_id_status(task_id, dnac_jwt_token):
+def check_task_id_status(task_id, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     This function will check the status of the task with the id {task_id}
     :param task_id: task id
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return: status - {SUCCESS} or {FAILURE}
     """
-    url = DNAC_URL + '/dna/intent/api/v1/task/' + task_id
-    header = {'content-type': 'application/json', 'x-auth-token': dnac_jwt_token}
-    task_response = requests.get(url, headers=header, verify=False)
-    task_json = task_response.json()
-    task_status = task_json['response']['isError']
+    task_status = get_task_by_id(task_id, dnac_jwt_token, dnac_url=dnac_url, session=session)['isError']
     if not task_status:
         task_result = 'SUCCESS'
     else:
@@ -402,17 +513,30 @@ def check_task_id_status(task_id, dnac_jwt_token):
     return task_result
 
 
-def get_device_id_name(device_name, dnac_jwt_token):
+def get_device_id_name(device_name, dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
     """
     This function will find the DNA C device id for the device with the name {device_name}
     :param device_name: device hostname
     :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
     :return:
     """
     device_id = None
-    device_list = get_all_device_info(dnac_jwt_token)
+    device_list = get_all_device_info(dnac_jwt_token, dnac_url=dnac_url, session=session)
     for device in device_list:
         if device['hostname'] == device_name:
             device_id = device['id']
     return device_id
 
+
+def get_device_id_map(dnac_jwt_token, dnac_url=DNAC_URL, session=requests):
+    """
+    This function will map the hostnames to the DNA C device ids, for all network devices, with one request
+    :param dnac_jwt_token: DNA C token
+    :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+    :param session: requests session, holding the Cisco DNA Center connection pool
+    :return: dict, device hostname: device id
+    """
+    device_list = get_all_device_info(dnac_jwt_token, dnac_url=dnac_url, session=session)
+    return dict((device['hostname'], device['id']) for device in device_list)
@@ -30,20 +30,29 @@ __license__ = "Cisco Sample Code License, Version 1.1"
 
 import requests
 import urllib3
+import os
+import sys
 import json
 import datetime
 import logging
 import time
+import queue
+import concurrent.futures
 import dnac_apis
 import ise_apis
+import task_watcher
+import controller_registry
+import intent_reader
 
 
+from collections import OrderedDict, deque
 from urllib3.exceptions import InsecureRequestWarning  # for insecure https warnings
 from requests.auth import HTTPBasicAuth  # for Basic Auth
 
 from config import DNAC_URL, DNAC_PASS, DNAC_USER
 from config import DNAC_PROJECT, DNAC_TEMPLATE, CLI_TEMPLATE, IBN_INFO
 from config import ISE_URL, ISE_USER, ISE_PASS
+from config import CONTROLLERS_INFO
 
 urllib3.disable_warnings(InsecureRequestWarning)  # disable insecure https warnings
 
@@ -51,6 +60,10 @@ urllib3.disable_warnings(InsecureRequestWarning)  # disable insecure https warni
 DNAC_AUTH = HTTPBasicAuth(DNAC_USER, DNAC_PASS)
 ISE_AUTH = HTTPBasicAuth(ISE_USER, ISE_PASS)
 
+CONTROLLER_QUEUE_SIZE = 100  # max number of intents waiting for each controller, in the batch provisioning
+MAX_PENDING_DEPLOYMENTS = 50  # max number of deployments in progress or waiting, for each controller
+SYNC_BATCH_SIZE = 20  # number of switches synced with one sync request
+
 
 def pprint(json_data):
     """
@@ -61,10 +74,359 @@ def pprint(json_data):
     print(json.dumps(json_data, indent=4, separators=(' , ', ' : ')))
 
 
-def main():
+def log_result(result):
+    """
+    Default handler for the provisioning results, log the result of each template deployment
+    :param result: deployment result
+    :return: None
+    """
+    logging.info('Provisioning result: ' + json.dumps(result))
+
+
+def new_summary():
+    """
+    :return: empty provisioning summary, the number of deployments, switch syncs and ISE endpoints for each status,
+    and the deployment results with errors
+    """
+    return {'deploymentStatus': {}, 'syncStatus': {}, 'iseStatusCodes': {}, 'failures': []}
+
+
+def add_to_summary(summary, result):
+    """
+    This function will add the deployment result {result} to the provisioning summary {summary}
+    :param summary: provisioning summary, from {new_summary}
+    :param result: deployment result
+    :return: None
+    """
+    for key in ('deploymentStatus', 'syncStatus'):
+        summary[key][result[key]] = summary[key].get(result[key], 0) + 1
+    for status_code, count in result['iseStatusCodes'].items():
+        summary['iseStatusCodes'][status_code] = summary['iseStatusCodes'].get(status_code, 0) + count
+    if result['deploymentStatus'] != 'SUCCESS' or result['syncStatus'] != 'SUCCESS' or result['iseFailures']:
+        summary['failures'].append(result)
+
+
+def provision_controller(controller, intents, cli_config, max_pending=MAX_PENDING_DEPLOYMENTS, on_result=log_result):
+    """
+    This function will provision the intents {intents} using the Cisco DNA Center and ISE of the controller {controller}.
+    The intents are deployed while they are read, up to {max_pending} deployments are in progress or waiting. The
+    deployments to the same switch run one after the other, the next one starts when the previous one is completed.
+    The MAC addresses are added to ISE as soon as the deployment is successful, and the switches are synced in batches
+    of {SYNC_BATCH_SIZE} switches, with one sync request.
+    :param controller: controller, from the controller registry
+    :param intents: iterable of intents, same format as the IBN template, or combined deployments from
+    {intent_reader.group_intents_by_switch}, with the list of combined intents in {intents}
+    :param cli_config: CLI template text content
+    :param max_pending: max number of deployments in progress or waiting, for this controller
+    :param on_result: function called with the result of each template deployment, when completed
+    :return: provisioning summary, from {new_summary}
+    """
+    dnac_url = controller.dnac_url
+    session = controller.session
+
+    # check if existing Cisco DNA Center project, create and commit the CLI template
+    dnac_apis.create_project(DNAC_PROJECT, controller.get_dnac_token(), dnac_url=dnac_url, session=session)
+    dnac_apis.create_commit_template(DNAC_TEMPLATE, DNAC_PROJECT, cli_config, controller.get_dnac_token(),
+                                     dnac_url=dnac_url, session=session)
+    time.sleep(5)  # wait for the commit to complete
+
+    # the template version id, device ids and endpoint group ids are retrieved once, for all deployments
+    template_id = dnac_apis.get_template_id_version(DNAC_TEMPLATE, DNAC_PROJECT, controller.get_dnac_token(),
+                                                    dnac_url=dnac_url, session=session)
+    device_ids = dnac_apis.get_device_id_map(controller.get_dnac_token(), dnac_url=dnac_url, session=session)
+    device_ids = dict((device_name.lower(), device_id) for device_name, device_id in device_ids.items())
+    endpoint_group_ids = {}
+
+    summary = new_summary()
+    completed = queue.Queue()  # deployments completed, (result, future), from the task watcher thread
+    device_backlog = {}  # switch: deployments waiting for the deployment in progress to the same switch
+    sync_waiting = OrderedDict()  # switch: results waiting for the switch sync
+    sync_tasks = deque()  # (sync future, results), in the order the syncs started
+    pending = [0]
+
+    def report(result):
+        on_result(result)
+        add_to_summary(summary, result)
+
+    def report_syncs(wait=False):
+        # report the results of the completed syncs, in order, or wait for all the syncs
+        while sync_tasks and (wait or sync_tasks[0][0].done()):
+            sync_future, sync_results = sync_tasks.popleft()
+            sync_status = get_status(sync_future)[0]
+            for device_id, device_results in sync_results:
+                for result in device_results:
+                    result['syncStatus'] = sync_status
+                    report(result)
+
+    with task_watcher.TaskWatcher(controller.get_dnac_token, dnac_url=dnac_url, session=session) as watcher:
+
+        def start_deployment(ibn_json):
+            result = {'controller': controller.name, 'switchName': ibn_json['switchName'],
+                      'switchport': ibn_json['switchport'], 'intents': ibn_json.get('intents', [ibn_json])}
+            parameters = {"vlanId": ibn_json['vlan'], "switchport": ibn_json['switchport']}
+            try:
+                depl_template_id = dnac_apis.deploy_template_id(template_id, ibn_json['switchName'], parameters,
+                                                                controller.get_dnac_token(), dnac_url=dnac_url,
+                                                                session=session)
+                watcher.watch_deployment(depl_template_id,
+                                         callback=lambda future: completed.put((result, future)))
+            except Exception as error:
+                logging.exception(controller.name + ' - ' + ibn_json['switchName'] + ' deployment failed')
+                result['deploymentStatus'] = 'ERROR'
+                result['error'] = repr(error)
+                completed.put((result, None))
+
+        def finish_deployment(result, future):
+            if future is not None:
+                result['deploymentStatus'], error = get_status(future)
+                if error is not None:
+                    result['error'] = error
+            logging.info(controller.name + ' - ' + result['switchName'] + ' deployment: ' + result['deploymentStatus'])
+            add_endpoints(controller, result, endpoint_group_ids)
+            device_name = result['switchName'].lower()
+            if result['deploymentStatus'] != 'SUCCESS':
+                result['syncStatus'] = 'SKIPPED'
+                report(result)
+            elif device_name not in device_ids:
+                result['syncStatus'] = 'NOT_FOUND'
+                report(result)
+            else:
+                sync_waiting.setdefault(device_name, []).append(result)
+            # start the next deployment to the same switch, if any
+            if device_backlog[device_name]:
+                start_deployment(device_backlog[device_name].popleft())
+            else:
+                del device_backlog[device_name]
+                if len(sync_waiting) >= SYNC_BATCH_SIZE:
+                    start_sync()
+            pending[0] -= 1
+
+        def start_sync():
+            sync_results = []
+            for device_name in [device_name for device_name in sync_waiting if device_name not in device_backlog]:
+                sync_results.append((device_ids[device_name], sync_waiting.pop(device_name)))
+            if not sync_results:
+                return
+            try:
+                sync_task_id = dnac_apis.sync_devices([device_id for device_id, device_results in sync_results],
+                                                      controller.get_dnac_token(), dnac_url=dnac_url,
+                                                      session=session)[1]
+                sync_tasks.append((watcher.watch_task(sync_task_id), sync_results))
+            except Exception:
+                logging.exception(controller.name + ' - sync failed')
+                for device_id, device_results in sync_results:
+                    for result in device_results:
+                        result['syncStatus'] = 'ERROR'
+                        report(result)
+
+        for ibn_json in intents:
+            while pending[0] >= max_pending:
+                finish_deployment(*completed.get())
+            pending[0] += 1
+            device_name = ibn_json['switchName'].lower()
+            if device_name in device_backlog:
+                device_backlog[device_name].append(ibn_json)
+            else:
+                device_backlog[device_name] = deque()
+                start_deployment(ibn_json)
+            while not completed.empty():
+                finish_deployment(*completed.get())
+            report_syncs()
+        while pending[0]:
+            finish_deployment(*completed.get())
+        start_sync()
+        report_syncs(wait=True)
+    return summary
+
+
+def add_endpoints(controller, result, endpoint_group_ids):
+    """
+    This function will add the MAC addresses for the intents in the deployment result {result} to MAB in ISE, if the
+    deployment was successful. The result keeps the number of endpoints for each ISE status code, and the MAC
+    addresses not added.
+    :param controller: controller, from the controller registry
+    :param result: deployment result, with the list of intents in {intents}
+    :param endpoint_group_ids: dict endpoint group name: endpoint group id, updated with the new endpoint groups
+    :return: None
+    """
+    result['iseStatusCodes'] = {}
+    result['iseFailures'] = []
+    for ibn_json in result.pop('intents'):
+        if result['deploymentStatus'] != 'SUCCESS':
+            continue
+        try:
+            eg_name = ibn_json['endpointGroup']
+            if eg_name not in endpoint_group_ids:
+                endpoint_group_info = ise_apis.get_endpoint_group_by_name(eg_name, controller.ise_auth,
+                                                                          ise_url=controller.ise_url,
+                                                                          session=controller.session)
+                endpoint_group_ids[eg_name] = endpoint_group_info['EndPointGroup']['id']
+            add_endpoint_status = ise_apis.add_endpoint(ibn_json['macAddress'], endpoint_group_ids[eg_name],
+                                                        controller.ise_auth, ise_url=controller.ise_url,
+                                                        session=controller.session)
+        except Exception:
+            logging.exception(controller.name + ' - adding ' + ibn_json['macAddress'] + ' to ISE failed')
+            add_endpoint_status = 'ERROR'
+        status_code = str(add_endpoint_status)
+        result['iseStatusCodes'][status_code] = result['iseStatusCodes'].get(status_code, 0) + 1
+        if add_endpoint_status != 201:
+            result['iseFailures'].append(ibn_json['macAddress'])
+
+
+def get_status(future):
+    """
+    This function will wait for the deployment or task future {future}, from the task watcher
+    :param future: task watcher future
+    :return: the status - {SUCCESS}, {FAILURE}, {TIMEOUT} or {ERROR}, and the error, if any
+    """
+    try:
+        future_result = future.result()
+    except concurrent.futures.TimeoutError as error:
+        return 'TIMEOUT', repr(error)
+    except Exception as error:
+        return 'ERROR', repr(error)
+    if isinstance(future_result, dict):
+        return ('FAILURE' if future_result.get('isError') else 'SUCCESS'), None
+    return future_result, None
+
+
+def read_queue(intents_queue):
+    """
+    This function will read the intents from the queue {intents_queue}, until the end of the batch
+    :param intents_queue: queue of intents, None marks the end of the batch
+    :return: generator of intents
+    """
+    while True:
+        ibn_json = intents_queue.get()
+        if ibn_json is None:
+            return
+        yield ibn_json
+
+
+def put_queue(intents_queue, ibn_json, controller_future):
+    """
+    This function will add the intent {ibn_json} to the queue {intents_queue}, waiting while the queue is full
+    :param intents_queue: controller queue of intents
+    :param ibn_json: intent, or None for the end of the batch
+    :param controller_future: future for the controller provisioning
+    :return: True, or False if the controller provisioning stopped, and will not read the queue
+    """
+    while True:
+        try:
+            intents_queue.put(ibn_json, timeout=1)
+            return True
+        except queue.Full:
+            if controller_future.done():
+                return False
+
+
+def provision_batch(intents, registry, cli_config, queue_size=CONTROLLER_QUEUE_SIZE, on_result=log_result):
+    """
+    This function will route each of the intents {intents} to the controller managing the switch, while they are
+    read, and provision the controllers in parallel, one thread for each controller. Each controller reads the intents
+    from a queue of {queue_size} intents, the intents are read only as fast as the controllers provision them.
+    :param intents: iterable of intents, same format as the IBN template
+    :param registry: controller registry
+    :param cli_config: CLI template text content
+    :param queue_size: max number of intents waiting for each controller
+    :param on_result: function called with the result of each template deployment, from the controller threads
+    :return: dict, controller name: provisioning summary, or the exception raised for the controller
+    """
+    batch_results = {}
+    intent_queues = {}
+    futures = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(registry.controllers)) as executor:
+        try:
+            for ibn_json in intents:
+                try:
+                    controller = registry.route_intent(ibn_json)
+                except LookupError as error:
+                    logging.warning(str(error))
+                    continue
+                if controller.name not in intent_queues:
+                    intent_queues[controller.name] = queue.Queue(maxsize=queue_size)
+                    future = executor.submit(provision_controller, controller,
+                                             read_queue(intent_queues[controller.name]), cli_config,
+                                             on_result=on_result)
+                    futures[controller.name] = future
+                if not put_queue(intent_queues[controller.name], ibn_json, futures[controller.name]):
+                    logging.warning('Provisioning stopped for the controller: ' + controller.name +
+                                    ', intent skipped for the switch: ' + ibn_json['switchName'])
+        finally:
+            # end of the batch for all controllers
+            for controller_name, intents_queue in intent_queues.items():
+                put_queue(intents_queue, None, futures[controller_name])
+        for controller_name, future in futures.items():
+            try:
+                batch_results[controller_name] = future.result()
+            except Exception as error:
+                logging.exception('Provisioning failed for the controller: ' + controller_name)
+                batch_results[controller_name] = error
+    return batch_results
+
+
+def provision_intents_file(file_name, registry, cli_config, file_format=None, on_reject=intent_reader.log_reject,
+                           on_result=log_result):
+    """
+    This function will provision the intents from the file with the name {file_name}. The intents are validated,
+    deduplicated and combined in one template deployment for each switch and VLAN, while the file is read.
+    :param file_name: intents file, JSON lines or CSV with a header row
+    :param registry: controller registry
+    :param cli_config: CLI template text content
+    :param file_format: 'csv' or 'jsonl', default from the file name extension
+    :param on_reject: function called with the record number, record and reason for each rejected intent
+    :param on_result: function called with the result of each template deployment
+    :return: dict, controller name: provisioning summary, or the exception raised for the controller
+    """
+    intents = intent_reader.stream_intents(file_name, file_format=file_format, on_reject=on_reject)
+    deployments = intent_reader.group_intents_by_switch(intents)
+    return provision_batch(deployments, registry, cli_config, on_result=on_result)
+
+
+def load_controllers():
+    """
+    This function will create the controller registry from the {CONTROLLERS_INFO} file, if existing, or with the
+    Cisco DNA Center and ISE info from {config.py}
+    :return: controller registry
+    """
+    if os.path.exists(CONTROLLERS_INFO):
+        return controller_registry.load_registry(CONTROLLERS_INFO)
+    return controller_registry.default_registry()
+
+
+def batch_main(file_name, cli_config):
+    """
+    This function will provision all the intents from the file with the name {file_name}, using the controllers from
+    the controller registry, and print the summary for each controller and the number of rejected intents. The
+    result of each deployment, and each rejected intent, are logged.
+    :param file_name: intents file, JSON lines or CSV with a header row
+    :param cli_config: CLI template text content
+    :return: None
+    """
+    rejects = [0]
+
+    def count_reject(record_number, record, reason):
+        rejects[0] += 1
+        intent_reader.log_reject(record_number, record, reason)
+
+    with load_controllers() as registry:
+        batch_results = provision_intents_file(file_name, registry, cli_config, on_reject=count_reject)
+    for controller_name, summary in batch_results.items():
+        if isinstance(summary, Exception):
+            print('\nProvisioning failed for the controller: ', controller_name, repr(summary))
+        else:
+            print('\nProvisioning summary for the controller: ', controller_name)
+            pprint({'deploymentStatus': summary['deploymentStatus'], 'syncStatus': summary['syncStatus'],
+                    'iseStatusCodes': summary['iseStatusCodes'], 'failures': len(summary['failures'])})
+    print('\nIntents rejected: ', rejects[0])
+
+
+def main(intents_file=None):
     """
     This application will automate the provisioning of a new network using the Cisco DNA Center REST APIs, to create,
     upload, and deploy CLI templates.
+    :param intents_file: optional intents file, JSON lines or CSV, provisioned using the controller registry, instead
+    of the {IBN_INFO} template
     :return:
     """
 
@@ -79,6 +441,14 @@ def main():
     date_time = str(datetime.datetime.now().replace(microsecond=0))
     print('\nThe Application "ibn_provisioning.py" started running at this time ' + date_time)
 
+    if intents_file is not None:
+        with open(CLI_TEMPLATE, 'r') as filehandle:
+            cli_config = filehandle.read()
+        batch_main(intents_file, cli_config)
+        date_time = str(datetime.datetime.now().replace(microsecond=0))
+        print('\nEnd of the application "ibn_provisioning.py" run at this time ' + date_time)
+        return
+
     # get the Cisco DNA Center auth token
     dnac_token = dnac_apis.get_dnac_jwt_token(DNAC_AUTH)
     print('\nThe Cisco DNA Center Auth token is:\n' + dnac_token)
@@ -103,7 +473,7 @@ def main():
     with open(IBN_INFO, 'r') as filehandle:
         ibn_info = filehandle.read()
 
-    ibn_json = json.loads(ibn_info)
+    ibn_json = intent_reader.validate_intent(json.loads(ibn_info))
     vlan_id = ibn_json['vlan']
     device_name = ibn_json['switchName']
     switchport = ibn_json['switchport']
@@ -120,9 +490,14 @@ def main():
     depl_template_id = dnac_apis.deploy_template(DNAC_TEMPLATE, DNAC_PROJECT, device_name, parameters, dnac_token)
     print('\nDeployment Task id: ', depl_template_id)
 
+    # watch the deployment and sync tasks, polling stops as soon as each one is completed
+    watcher = task_watcher.TaskWatcher(dnac_token)
+
     # check for the deployment status
-    time.sleep(10)  # wait 10 seconds for deployment to complete
-    deployment_status = dnac_apis.check_template_deployment_status(depl_template_id, dnac_token)
+    try:
+        deployment_status = watcher.watch_deployment(depl_template_id).result()
+    except concurrent.futures.TimeoutError:
+        deployment_status = 'TIMEOUT'
     print('\nTemplate deployment status: ' + deployment_status)
 
     # start Cisco DNA center sync
@@ -131,9 +506,16 @@ def main():
     sync_task_id = sync_response[1]
     print('\nSync of the network device: "', device_name, '" started, task id: ', sync_task_id)
 
-    # wait 2 minutes, check the sync task completion
-    time.sleep(120)
-    sync_task_status = dnac_apis.check_task_id_status(sync_task_id, dnac_token)
+    # check the sync task completion
+    try:
+        sync_task_output = watcher.watch_task(sync_task_id).result()
+        if not sync_task_output['isError']:
+            sync_task_status = 'SUCCESS'
+        else:
+            sync_task_status = 'FAILURE'
+    except concurrent.futures.TimeoutError:
+        sync_task_status = 'TIMEOUT'
+    watcher.close()
     print('\nSync of device: "', device_name, '" : ', sync_task_status)
 
     # add POS MAC address to MAB in ISE
@@ -147,4 +529,4 @@ def main():
     print('\nEnd of the application "ibn_provisioning.py" run at this time ' + date_time)
 
 if __name__ == '__main__':
-    main()
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
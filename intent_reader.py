@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+
+
+Copyright (c) 2019 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2019 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import csv
+import json
+import logging
+import re
+
+
+from collections import OrderedDict
+
+
+# intent fields, same names as the IBN template, with the required ones first
+REQUIRED_FIELDS = ('switchName', 'vlan', 'switchport', 'macAddress', 'endpointGroup')
+OPTIONAL_FIELDS = ('location', 'vrf', 'vedge')
+
+# interface names, and the abbreviations accepted for each one
+INTERFACE_NAMES = OrderedDict([
+    ('TwentyFiveGigE', ('twe',)),
+    ('TwoGigabitEthernet', ('tw',)),
+    ('FiveGigabitEthernet', ('fi',)),
+    ('TenGigabitEthernet', ('te', 'ten')),
+    ('FortyGigabitEthernet', ('fo',)),
+    ('HundredGigE', ('hu',)),
+    ('GigabitEthernet', ('gi', 'gig', 'ge')),
+    ('FastEthernet', ('fa',)),
+])
+
+INTERFACE_RANGE_MAX = 5  # max number of comma separated ranges in one IOS-XE "interface range" command
+MAX_GROUP_SIZE = 1000  # max number of intents held in memory for one switch, before the group is deployed
+MAX_BUFFERED_INTENTS = 10000  # max number of intents held in memory for all switches
+
+MAC_PATTERN = re.compile(r'^[0-9a-f]{12}$')
+INTERFACE_PATTERN = re.compile(r'^([a-z-]+)\s*(\d+(?:/\d+)*)$', re.IGNORECASE)
+
+
+def normalize_mac(mac_address):
+    """
+    This function will normalize the MAC address {mac_address} to the format XX:XX:XX:XX:XX:XX
+    :param mac_address: MAC address, formats xx:xx:xx:xx:xx:xx, xx-xx-xx-xx-xx-xx, xxxx.xxxx.xxxx or xxxxxxxxxxxx
+    :return: normalized MAC address
+    """
+    mac_digits = re.sub(r'[:.\-\s]', '', str(mac_address)).lower()
+    if not MAC_PATTERN.match(mac_digits):
+        raise ValueError('Invalid MAC address: ' + str(mac_address))
+    return ':'.join(mac_digits[index:index + 2] for index in range(0, 12, 2)).upper()
+
+
+def normalize_interface(interface_name):
+    """
+    This function will normalize the interface name {interface_name} to the full IOS-XE interface name
+    :param interface_name: interface name, full or abbreviated, example Gi1/0/10
+    :return: normalized interface name, example GigabitEthernet1/0/10
+    """
+    match = INTERFACE_PATTERN.match(str(interface_name).strip())
+    if match:
+        interface_type = match.group(1).lower()
+        for name, abbreviations in INTERFACE_NAMES.items():
+            if interface_type == name.lower() or interface_type in abbreviations:
+                return name + match.group(2)
+    raise ValueError('Invalid interface name: ' + str(interface_name))
+
+
+def validate_intent(record):
+    """
+    This function will validate the intent {record}, and return the intent with the normalized values
+    :param record: intent, dict with the same fields as the IBN template
+    :return: normalized intent
+    """
+    if not isinstance(record, dict):
+        raise ValueError('Intent is not an object')
+    missing_fields = [field for field in REQUIRED_FIELDS if record.get(field) in (None, '')]
+    if missing_fields:
+        raise ValueError('Missing fields: ' + ', '.join(missing_fields))
+    vlan_value = record['vlan']
+    if isinstance(vlan_value, int) and not isinstance(vlan_value, bool):
+        vlan_id = vlan_value
+    elif isinstance(vlan_value, str) and vlan_value.strip().isdigit():
+        vlan_id = int(vlan_value.strip())
+    else:
+        raise ValueError('Invalid VLAN: ' + str(record['vlan']))
+    if not 1 <= vlan_id <= 4094:
+        raise ValueError('Invalid VLAN: ' + str(record['vlan']))
+    ibn_json = {
+        'switchName': str(record['switchName']).strip(),
+        'vlan': vlan_id,
+        'switchport': normalize_interface(record['switchport']),
+        'macAddress': normalize_mac(record['macAddress']),
+        'endpointGroup': str(record['endpointGroup']).strip()
+    }
+    for field in OPTIONAL_FIELDS:
+        if record.get(field) not in (None, ''):
+            ibn_json[field] = str(record[field]).strip()
+    return ibn_json
+
+
+def read_records(file_name, file_format=None):
+    """
+    This function will read the intent records from the file with the name {file_name}, one record at a time
+    :param file_name: intents file, JSON lines or CSV with a header row
+    :param file_format: 'csv' or 'jsonl', default from the file name extension
+    :return: generator of (record number, record), the record is None if the line is not valid JSON
+    """
+    if file_format is None:
+        file_format = 'csv' if file_name.lower().endswith('.csv') else 'jsonl'
+    # utf-8-sig, to skip the byte order mark added by some spreadsheet applications
+    with open(file_name, 'r', newline='', encoding='utf-8-sig') as filehandle:
+        if file_format == 'csv':
+            reader = csv.DictReader(filehandle)
+            if reader.fieldnames is not None:
+                reader.fieldnames = [field_name.strip() for field_name in reader.fieldnames]
+            for record_number, record in enumerate(reader, 1):
+                yield record_number, record
+        else:
+            for record_number, line in enumerate(filehandle, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield record_number, json.loads(line)
+                except ValueError:
+                    yield record_number, None
+
+
+def log_reject(record_number, record, reason):
+    """
+    Default handler for the rejected intents, log the record number and reason
+    :param record_number: record number, line number for JSON lines
+    :param record: the rejected record
+    :param reason: reject reason
+    :return: None
+    """
+    logging.warning('Intent ' + str(record_number) + ' rejected: ' + reason)
+
+
+def stream_intents(file_name, file_format=None, on_reject=log_reject):
+    """
+    This function will read, validate, normalize and deduplicate the intents from the file with the name {file_name}.
+    Only the switch, port, VLAN and MAC address of the accepted intents are kept in memory, to find the duplicate
+    and conflicting intents: a switch port already assigned to a different VLAN, or a MAC address already assigned
+    to a different switch port.
+    :param file_name: intents file, JSON lines or CSV with a header row
+    :param file_format: 'csv' or 'jsonl', default from the file name extension
+    :param on_reject: function called with the record number, record and reason for each rejected intent
+    :return: generator of normalized intents
+    """
+    port_vlans = {}
+    mac_ports = {}
+    for record_number, record in read_records(file_name, file_format):
+        if record is None:
+            on_reject(record_number, record, 'Invalid JSON')
+            continue
+        try:
+            ibn_json = validate_intent(record)
+        except ValueError as error:
+            on_reject(record_number, record, str(error))
+            continue
+        port_key = (ibn_json['switchName'].lower(), ibn_json['switchport'])
+        port_vlan = port_vlans.get(port_key)
+        if port_vlan is not None and port_vlan != ibn_json['vlan']:
+            on_reject(record_number, record, 'Switch port already assigned to VLAN ' + str(port_vlan))
+            continue
+        mac_port = mac_ports.get(ibn_json['macAddress'])
+        if mac_port == port_key:
+            on_reject(record_number, record, 'Duplicate intent')
+            continue
+        if mac_port is not None:
+            on_reject(record_number, record, 'MAC address already assigned to ' + mac_port[0] + ' ' + mac_port[1])
+            continue
+        port_vlans[port_key] = ibn_json['vlan']
+        mac_ports[ibn_json['macAddress']] = port_key
+        yield ibn_json
+
+
+def format_interface_range(interfaces):
+    """
+    This function will build the IOS-XE interface range list for the interfaces {interfaces}, consecutive ports
+    are merged, example GigabitEthernet1/0/1 - 3 , GigabitEthernet1/0/7
+    :param interfaces: list of normalized interface names
+    :return: list of interface ranges
+    """
+    ports = {}
+    for interface in interfaces:
+        prefix, port = re.match(r'^(.*?)(\d+)$', interface).groups()
+        ports.setdefault(prefix, set()).add(int(port))
+    interface_ranges = []
+    for prefix in sorted(ports):
+        port_list = sorted(ports[prefix])
+        first_port = last_port = port_list[0]
+        for port in port_list[1:] + [None]:
+            if port is not None and port == last_port + 1:
+                last_port = port
+                continue
+            if first_port == last_port:
+                interface_ranges.append(prefix + str(first_port))
+            else:
+                interface_ranges.append(prefix + str(first_port) + ' - ' + str(last_port))
+            first_port = last_port = port
+    return interface_ranges
+
+
+def combine_intents(intents):
+    """
+    This function will combine the intents {intents}, for the same switch and VLAN, into template deployments.
+    Each deployment configures up to {INTERFACE_RANGE_MAX} interface ranges, with one "interface range" command.
+    :param intents: list of normalized intents, for the same switch and VLAN
+    :return: list of deployments, same format as the intents, with the list of combined intents in {intents}
+    """
+    intents_by_port = OrderedDict()
+    for ibn_json in intents:
+        intents_by_port.setdefault(ibn_json['switchport'], []).append(ibn_json)
+    interface_ranges = format_interface_range(list(intents_by_port))
+    deployments = []
+    for index in range(0, len(interface_ranges), INTERFACE_RANGE_MAX):
+        range_list = interface_ranges[index:index + INTERFACE_RANGE_MAX]
+        range_intents = [ibn_json for switchport, port_intents in intents_by_port.items()
+                         if interface_in_ranges(switchport, range_list) for ibn_json in port_intents]
+        deployment = dict(range_intents[0])
+        if len(range_intents) == 1 or len(intents_by_port) == 1:
+            deployment['switchport'] = range_intents[0]['switchport']
+        else:
+            deployment['switchport'] = 'range ' + ' , '.join(range_list)
+        deployment['intents'] = range_intents
+        deployments.append(deployment)
+    return deployments
+
+
+def interface_in_ranges(interface, interface_ranges):
+    """
+    This function will check if the interface {interface} is part of one of the interface ranges {interface_ranges}
+    :param interface: normalized interface name
+    :param interface_ranges: list of interface ranges, from {format_interface_range}
+    :return: True or False
+    """
+    prefix, port = re.match(r'^(.*?)(\d+)$', interface).groups()
+    for interface_range in interface_ranges:
+        range_prefix, first_port, last_port = re.match(r'^(.*?)(\d+)(?: - (\d+))?$', interface_range).groups()
+        if range_prefix == prefix and int(first_port) <= int(port) <= int(last_port or first_port):
+            return True
+    return False
+
+
+def group_intents_by_switch(intents, max_group_size=MAX_GROUP_SIZE, max_buffered=MAX_BUFFERED_INTENTS):
+    """
+    This function will group the intents {intents} by switch and VLAN, so each switch gets one combined template
+    deployment for each VLAN. A group is deployed early when it reaches {max_group_size} intents, and the oldest
+    group is deployed early when all the groups hold more than {max_buffered} intents.
+    :param intents: iterable of normalized intents
+    :param max_group_size: max number of intents held in memory for one switch and VLAN
+    :param max_buffered: max number of intents held in memory for all switches
+    :return: generator of deployments, from {combine_intents}
+    """
+    intent_groups = OrderedDict()
+    buffered = 0
+    for ibn_json in intents:
+        group_key = (ibn_json['switchName'].lower(), ibn_json['vlan'])
+        group = intent_groups.setdefault(group_key, [])
+        group.append(ibn_json)
+        buffered += 1
+        if len(group) >= max_group_size:
+            del intent_groups[group_key]
+        elif buffered > max_buffered:
+            group = intent_groups.pop(next(iter(intent_groups)))
+        else:
+            continue
+        buffered -= len(group)
+        for deployment in combine_intents(group):
+            yield deployment
+    for group in intent_groups.values():
+        for deployment in combine_intents(group):
+            yield deployment
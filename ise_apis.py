@@ -56,32 +56,50 @@ def pprint(json_data):
     print(json.dumps(json_data, indent=4, separators=(' , ', ' : ')))
 
 
-def get_endpoint_group_by_name(eg_name, ise_auth):
+def get_endpoint_group_by_name(eg_name, ise_auth, ise_url=ISE_URL, session=requests):
     """
     This function will retrieve the info for the ISE endpoint group with the name {eg_name}
     :param eg_name: endpoint group name
     :param ise_auth: ISE auth token
+    :param ise_url: ISE URL, default {ISE_URL}
+    :param session: requests session, holding the ISE connection pool
     :return:
     """
-    url = ISE_URL + '/ers/config/endpointgroup/name/' + str(eg_name)
+    url = ise_url + '/ers/config/endpointgroup/name/' + str(eg_name)
     header = {'content-type': 'application/json', 'accept': 'application/json'}
-    response = requests.get(url, auth=ise_auth, headers=header, verify=False)
+    response = session.get(url, auth=ise_auth, headers=header, verify=False)
     response_json = response.json()
     return response_json
 
 
-def add_endpoint_by_mac(mac_address, eg_name, ise_auth):
+def add_endpoint_by_mac(mac_address, eg_name, ise_auth, ise_url=ISE_URL, session=requests):
     """
     This function will add an endpoint with the MAC address {mac_address} to the endpoint group with the name {eg_name}
     :param mac_address: client MAC Address in fromat xx:xx:xx:xx:xx:xx
     :param eg_name: endpoint group name
     :param ise_auth: ISE auth token
+    :param ise_url: ISE URL, default {ISE_URL}
+    :param session: requests session, holding the ISE connection pool
     :return:
     """
     # get the endpoint group id
-    endpoint_group_info = get_endpoint_group_by_name(eg_name, ise_auth)
+    endpoint_group_info = get_endpoint_group_by_name(eg_name, ise_auth, ise_url=ise_url, session=session)
     endpoint_group_id = endpoint_group_info['EndPointGroup']['id']
-    url = ISE_URL + '/ers/config/endpoint'
+    return add_endpoint(mac_address, endpoint_group_id, ise_auth, ise_url=ise_url, session=session)
+
+
+def add_endpoint(mac_address, endpoint_group_id, ise_auth, ise_url=ISE_URL, session=requests):
+    """
+    This function will add an endpoint with the MAC address {mac_address} to the endpoint group with the id
+    {endpoint_group_id}
+    :param mac_address: client MAC Address in fromat xx:xx:xx:xx:xx:xx
+    :param endpoint_group_id: endpoint group id
+    :param ise_auth: ISE auth token
+    :param ise_url: ISE URL, default {ISE_URL}
+    :param session: requests session, holding the ISE connection pool
+    :return: the response status code, 201 if the endpoint was created
+    """
+    url = ise_url + '/ers/config/endpoint'
     param = {
         "ERSEndPoint": {
             "name": mac_address,
@@ -93,8 +111,6 @@ def add_endpoint_by_mac(mac_address, eg_name, ise_auth):
             "staticGroupAssignment": True
             }
     }
-    pprint(param)
     header = {'content-type': 'application/json', 'accept': 'application/json'}
-    response = requests.post(url, auth=ise_auth, data=json.dumps(param), headers=header, verify=False)
+    response = session.post(url, auth=ise_auth, data=json.dumps(param), headers=header, verify=False)
     return response.status_code
-
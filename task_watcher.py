@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+
+
+Copyright (c) 2019 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2019 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+import requests
+import concurrent.futures
+import dnac_apis
+
+
+from collections import OrderedDict
+
+from config import DNAC_URL, TASK_TIMEOUT
+
+
+TASK = 'task'
+DEPLOYMENT = 'deployment'
+
+TASK_LIST_LOOKBACK = 60  # seconds, covers the controller clock skew
+TASK_LIST_MAX_PAGES = 10  # max number of task list pages read for one poll, the tasks not found are polled by id
+
+
+class TaskWatcher(object):
+    """
+    Watch any number of Cisco DNA Center task ids and template deployment ids from one polling thread.
+    All the watched task ids are polled together, on one shared tick: the task list, read one page of {batch_size}
+    tasks at a time until all of them are found, returns the status for all the watched tasks. The tick interval
+    starts at {min_interval} and grows by {backoff} up to {max_interval} seconds, and is reset when a new task is
+    watched. The template deployments have no list API, each deployment id is polled at its own interval.
+    A failed poll is retried at the next interval, the future fails after {max_errors} consecutive errors, or with
+    a TimeoutError if the task is not completed after {timeout} seconds.
+    """
+
+    def __init__(self, dnac_jwt_token, min_interval=1, max_interval=30, backoff=1.5, batch_size=500, max_errors=5,
+                 timeout=TASK_TIMEOUT, dnac_url=DNAC_URL, session=requests):
+        """
+        :param dnac_jwt_token: Cisco DNA Center token, or a function returning the current token
+        :param min_interval: first polling interval, in seconds
+        :param max_interval: max polling interval, in seconds
+        :param backoff: polling interval multiplier, applied each time a poll finds the tasks still running
+        :param batch_size: number of tasks retrieved with one task list request
+        :param max_errors: number of consecutive failed polls before the future fails
+        :param timeout: max time to wait for each task or deployment to complete, in seconds, None to wait forever
+        :param dnac_url: Cisco DNA Center URL, default {DNAC_URL}
+        :param session: requests session, holding the Cisco DNA Center connection pool
+        """
+        self.dnac_jwt_token = dnac_jwt_token
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.timeout = timeout
+        self.dnac_url = dnac_url
+        self.session = session
+        self._condition = threading.Condition()
+        self._tasks = OrderedDict()
+        self._task_due = None
+        self._task_interval = min_interval
+        self._deployments = {}
+        self._schedule = []
+        self._sequence = itertools.count()
+        self._thread = None
+        self._closed = False
+
+    def watch_task(self, task_id, callback=None, timeout=None):
+        """
+        This method will start watching the task with the id {task_id}
+        :param task_id: task id
+        :param callback: optional function called with the future when the task is completed
+        :param timeout: max time to wait for the task to complete, in seconds, default the watcher {timeout}
+        :return: future, with the task info as result
+        """
+        return self._watch(TASK, task_id, callback, timeout)
+
+    def watch_deployment(self, depl_task_id, callback=None, timeout=None):
+        """
+        This method will start watching the template deployment with the id {depl_task_id}
+        :param depl_task_id: template deployment id
+        :param callback: optional function called with the future when the deployment is completed
+        :param timeout: max time to wait for the deployment to complete, in seconds, default the watcher {timeout}
+        :return: future, with the deployment status as result
+        """
+        return self._watch(DEPLOYMENT, depl_task_id, callback, timeout)
+
+    def pending(self):
+        """
+        :return: the number of task and deployment ids still being watched
+        """
+        with self._condition:
+            return len(self._tasks) + len(self._deployments)
+
+    def close(self):
+        """
+        This method will stop the polling thread, and cancel the futures for the ids still being watched
+        :return: None
+        """
+        with self._condition:
+            self._closed = True
+            watched = list(self._tasks.values()) + list(self._deployments.values())
+            self._tasks.clear()
+            self._deployments.clear()
+            self._schedule = []
+            self._condition.notify()
+        for entry in watched:
+            entry['future'].cancel()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _watch(self, kind, watched_id, callback, timeout):
+        if timeout is None:
+            timeout = self.timeout
+        now = time.time()
+        watched = self._tasks if kind == TASK else self._deployments
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('TaskWatcher is closed')
+            entry = watched.get(watched_id)
+            if entry is None:
+                entry = {
+                    'future': concurrent.futures.Future(),
+                    'interval': self.min_interval,
+                    'start_time': (now - TASK_LIST_LOOKBACK) * 1000,
+                    'deadline': now + timeout if timeout is not None else None,
+                    'errors': 0
+                }
+                watched[watched_id] = entry
+                if kind == TASK:
+                    # a new task joins the shared tick, which is brought forward to {min_interval}
+                    self._task_interval = self.min_interval
+                    if self._task_due is None or self._task_due > now + self.min_interval:
+                        self._task_due = now + self.min_interval
+                else:
+                    self._push(watched_id, now + self.min_interval)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='dnac-task-watcher')
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+        if callback is not None:
+            entry['future'].add_done_callback(callback)
+        return entry['future']
+
+    def _get_token(self):
+        if callable(self.dnac_jwt_token):
+            return self.dnac_jwt_token()
+        return self.dnac_jwt_token
+
+    def _push(self, depl_task_id, due_time):
+        heapq.heappush(self._schedule, (due_time, next(self._sequence), depl_task_id))
+
+    def _next_due(self):
+        due_times = [due_time[0] for due_time in self._schedule[:1]]
+        if self._tasks and self._task_due is not None:
+            due_times.append(self._task_due)
+        return min(due_times) if due_times else None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    now = time.time()
+                    next_due = self._next_due()
+                    if next_due is not None and next_due <= now:
+                        break
+                    self._condition.wait(next_due - now if next_due is not None else None)
+                if self._closed:
+                    return
+                poll_tasks = bool(self._tasks) and self._task_due is not None and self._task_due <= now
+                if poll_tasks:
+                    self._task_due = None
+                depl_ids = []
+                while self._schedule and self._schedule[0][0] <= now:
+                    depl_task_id = heapq.heappop(self._schedule)[2]
+                    entry = self._deployments.get(depl_task_id)
+                    if entry is not None and entry['future'].cancelled():
+                        del self._deployments[depl_task_id]
+                    elif entry is not None:
+                        depl_ids.append(depl_task_id)
+            # an unexpected error counts as a failed poll for the ids polled, and never stops the polling thread
+            if poll_tasks:
+                try:
+                    self._poll_tasks()
+                except Exception as error:
+                    logging.exception('Polling the tasks failed')
+                    with self._condition:
+                        task_ids = list(self._tasks)
+                    for task_id in task_ids:
+                        self._error(TASK, task_id, error)
+                    self._schedule_tasks()
+            for depl_task_id in depl_ids:
+                try:
+                    self._poll_deployment(depl_task_id)
+                except Exception as error:
+                    logging.exception('Polling the deployment ' + depl_task_id + ' failed')
+                    if self._error(DEPLOYMENT, depl_task_id, error):
+                        self._reschedule(depl_task_id)
+
+    def _poll_tasks(self):
+        with self._condition:
+            for task_id in [task_id for task_id, entry in self._tasks.items() if entry['future'].cancelled()]:
+                del self._tasks[task_id]
+            tasks = list(self._tasks.items())
+        if not tasks:
+            return
+        start_time = min(entry['start_time'] for task_id, entry in tasks)
+        task_list, errors = self._get_tasks([task_id for task_id, entry in tasks], start_time)
+        now = time.time()
+        for task_id, entry in tasks:
+            if task_id in errors:
+                self._error(TASK, task_id, errors[task_id])
+                continue
+            task_output = task_list[task_id]
+            try:
+                task_completed = dnac_apis.is_task_completed(task_output)
+            except Exception:
+                self._error(TASK, task_id, ValueError('Invalid task info: ' + repr(task_output)[:200]))
+                continue
+            entry['errors'] = 0
+            if task_completed:
+                self._complete(TASK, task_id, task_output)
+            elif entry['deadline'] is not None and now >= entry['deadline']:
+                self._timeout(TASK, task_id)
+        self._schedule_tasks()
+
+    def _schedule_tasks(self):
+        now = time.time()
+        with self._condition:
+            if self._tasks and self._task_due is None:
+                # all the tasks still running share the next tick
+                self._task_interval = min(self._task_interval * self.backoff, self.max_interval)
+                self._task_due = now + self._task_interval
+                deadlines = [entry['deadline'] for entry in self._tasks.values() if entry['deadline'] is not None]
+                if deadlines:
+                    self._task_due = min(self._task_due, max(min(deadlines), now))
+                self._condition.notify()
+
+    def _get_tasks(self, task_ids, start_time):
+        """
+        :return: dict task id: task info, and dict task id: error, for the tasks that could not be retrieved
+        """
+        task_list = {}
+        errors = {}
+        missing_ids = set(task_ids)
+        if len(task_ids) > 1:
+            try:
+                offset = 1
+                for page in range(TASK_LIST_MAX_PAGES):
+                    tasks = dnac_apis.get_task_list(start_time, self._get_token(), offset=offset,
+                                                    limit=self.batch_size, dnac_url=self.dnac_url,
+                                                    session=self.session)
+                    for task in tasks:
+                        if task['id'] in missing_ids:
+                            task_list[task['id']] = task
+                            missing_ids.discard(task['id'])
+                    if not missing_ids or len(tasks) < self.batch_size:
+                        break
+                    offset += self.batch_size
+            except Exception as error:
+                logging.warning('Task list request failed: ' + repr(error))
+                return task_list, dict((task_id, error) for task_id in missing_ids)
+        for task_id in task_ids:
+            if task_id in missing_ids:
+                try:
+                    task_list[task_id] = dnac_apis.get_task_by_id(task_id, self._get_token(),
+                                                                  dnac_url=self.dnac_url, session=self.session)
+                except Exception as error:
+                    errors[task_id] = error
+        return task_list, errors
+
+    def _poll_deployment(self, depl_task_id):
+        try:
+            deployment_status = dnac_apis.check_template_deployment_status(depl_task_id, self._get_token(),
+                                                                          dnac_url=self.dnac_url,
+                                                                          session=self.session)
+            if not isinstance(deployment_status, str):
+                raise ValueError('Invalid deployment status: ' + repr(deployment_status)[:200])
+        except Exception as error:
+            if self._error(DEPLOYMENT, depl_task_id, error):
+                self._reschedule(depl_task_id)
+            return
+        with self._condition:
+            entry = self._deployments.get(depl_task_id)
+        if entry is None:
+            return
+        entry['errors'] = 0
+        if dnac_apis.is_deployment_completed(deployment_status):
+            self._complete(DEPLOYMENT, depl_task_id, deployment_status)
+        elif entry['deadline'] is not None and time.time() >= entry['deadline']:
+            self._timeout(DEPLOYMENT, depl_task_id)
+        else:
+            self._reschedule(depl_task_id)
+
+    def _reschedule(self, depl_task_id):
+        with self._condition:
+            entry = self._deployments.get(depl_task_id)
+            if entry is not None:
+                entry['interval'] = min(entry['interval'] * self.backoff, self.max_interval)
+                due_time = time.time() + entry['interval']
+                if entry['deadline'] is not None:
+                    due_time = min(due_time, entry['deadline'])
+                self._push(depl_task_id, due_time)
+
+    def _error(self, kind, watched_id, error):
+        """
+        :return: True if the id is still watched, False if the future failed after {max_errors} consecutive errors
+        """
+        with self._condition:
+            entry = (self._tasks if kind == TASK else self._deployments).get(watched_id)
+        if entry is None:
+            return False
+        entry['errors'] += 1
+        logging.warning('Polling ' + kind + ' ' + watched_id + ' failed (' + str(entry['errors']) + '/' +
+                        str(self.max_errors) + '): ' + repr(error))
+        if entry['errors'] < self.max_errors:
+            return True
+        self._fail(kind, watched_id, error)
+        return False
+
+    def _timeout(self, kind, watched_id):
+        self._fail(kind, watched_id, concurrent.futures.TimeoutError(kind.capitalize() + ' ' + watched_id +
+                                                                     ' not completed before the timeout'))
+
+    def _complete(self, kind, watched_id, result):
+        with self._condition:
+            entry = (self._tasks if kind == TASK else self._deployments).pop(watched_id, None)
+        if entry is not None and not entry['future'].done():
+            entry['future'].set_result(result)
+
+    def _fail(self, kind, watched_id, error):
+        with self._condition:
+            entry = (self._tasks if kind == TASK else self._deployments).pop(watched_id, None)
+        if entry is not None and not entry['future'].done():
+            entry['future'].set_exception(error)
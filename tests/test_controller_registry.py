@@ -0,0 +1,93 @@
+import io
+import json
+
+import pytest
+import requests
+
+import controller_registry
+
+
+def make_controller(name, sites=(), switches=()):
+    return controller_registry.Controller(name, 'https://' + name, 'user', 'pass', 'https://ise-' + name, 'user',
+                                          'pass', sites=sites, switches=switches)
+
+
+@pytest.fixture
+def registry():
+    return controller_registry.ControllerRegistry([
+        make_controller('east', sites=['Branch'], switches=['BR-SW1.cisco.com']),
+        make_controller('west', sites=['Campus'], switches=['CA-SW1.cisco.com'])
+    ], default='east')
+
+
+def test_route_by_switch_first(registry):
+    assert registry.route('ca-sw1.cisco.com', 'Branch').name == 'west'
+
+
+def test_route_by_site(registry):
+    assert registry.route('CA-SW2.cisco.com', 'campus').name == 'west'
+
+
+def test_route_to_default(registry):
+    assert registry.route('unknown', 'unknown').name == 'east'
+
+
+def test_route_without_default():
+    registry = controller_registry.ControllerRegistry()
+    with pytest.raises(LookupError):
+        registry.route('unknown')
+
+
+def test_duplicate_controller_name(registry):
+    with pytest.raises(ValueError):
+        registry.add(make_controller('east'))
+
+
+def test_load_registry(tmp_path):
+    controllers_file = tmp_path / 'controllers.txt'
+    controllers_file.write_text(json.dumps({'default': 'missing', 'controllers': [
+        {'name': 'east', 'dnacUrl': 'u', 'dnacUser': 'u', 'dnacPass': 'p', 'iseUrl': 'u', 'iseUser': 'u',
+         'isePass': 'p'}]}))
+    with pytest.raises(ValueError):
+        controller_registry.load_registry(str(controllers_file))
+
+
+def make_response(status_code, dnac_token):
+    request = requests.Request('GET', 'https://east/dna/intent/api/v1/network-device',
+                               headers={'x-auth-token': dnac_token}).prepare()
+    response = requests.Response()
+    response.status_code = status_code
+    response.request = request
+    response.raw = io.BytesIO(b'{}')
+    return response
+
+
+def test_token_refreshed_on_401(monkeypatch):
+    controller = make_controller('east')
+    tokens = iter(['token-1', 'token-2'])
+    monkeypatch.setattr(controller_registry.dnac_apis, 'get_dnac_jwt_token', lambda *args, **kwargs: next(tokens))
+    sent = []
+    sent_kwargs = []
+    monkeypatch.setattr(controller.session, 'send',
+                        lambda request, **kwargs: sent.append(request) or sent_kwargs.append(kwargs) or
+                        make_response(200, 'token-2'))
+    assert controller.get_dnac_token() == 'token-1'
+
+    rejected = make_response(401, 'token-1')
+    response = controller._refresh_on_401(rejected, timeout=5, verify=False, stream=False)
+    assert response.status_code == 200
+    assert rejected.raw.read() == b''  # the 401 response is read before the retry
+    assert sent_kwargs[0] == {'timeout': 5, 'verify': False, 'stream': False}
+    assert sent[0].headers['x-auth-token'] == 'token-2'
+    assert sent[0].hooks == {'response': []}
+    assert controller.get_dnac_token() == 'token-2'
+
+    # a request sent with the old token is retried with the current token, without a new refresh
+    controller._refresh_on_401(make_response(401, 'token-1'))
+    assert sent[1].headers['x-auth-token'] == 'token-2'
+
+
+def test_other_responses_not_retried(monkeypatch):
+    controller = make_controller('east')
+    response = make_response(200, 'token-1')
+    assert controller._refresh_on_401(response) is response
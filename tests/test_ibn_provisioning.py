@@ -0,0 +1,163 @@
+import functools
+import threading
+
+import pytest
+
+import ibn_provisioning
+import controller_registry
+
+
+class FakeDnac(object):
+    """
+    Cisco DNA Center and ISE stub, the deployments complete after two status checks
+    """
+
+    def __init__(self, failing_switches=()):
+        self.failing_switches = failing_switches
+        self.lock = threading.Lock()
+        self.deployments = {}
+        self.in_progress = {}
+        self.max_in_progress = 0
+        self.synced = []
+        self.endpoints = []
+        self.endpoint_group_lookups = 0
+
+    def deploy_template_id(self, template_id, device_name, params, token, **kwargs):
+        if device_name in self.failing_switches:
+            raise KeyError('deploymentId')
+        with self.lock:
+            depl_task_id = 'deployment-' + str(len(self.deployments))
+            self.deployments[depl_task_id] = [device_name, 0]
+            self.in_progress[device_name] = self.in_progress.get(device_name, 0) + 1
+            self.max_in_progress = max(self.max_in_progress, self.in_progress[device_name])
+        return depl_task_id
+
+    def check_template_deployment_status(self, depl_task_id, token, **kwargs):
+        with self.lock:
+            deployment = self.deployments[depl_task_id]
+            deployment[1] += 1
+            if deployment[1] < 2:
+                return 'IN_PROGRESS'
+            self.in_progress[deployment[0]] -= 1
+            return 'SUCCESS'
+
+    def sync_devices(self, device_ids, token, **kwargs):
+        self.synced.append(sorted(device_ids))
+        return 202, 'sync-task'
+
+    def get_endpoint_group_by_name(self, eg_name, ise_auth, **kwargs):
+        self.endpoint_group_lookups += 1
+        return {'EndPointGroup': {'id': 'group-' + eg_name}}
+
+    def add_endpoint(self, mac_address, endpoint_group_id, ise_auth, **kwargs):
+        self.endpoints.append(mac_address)
+        return 201
+
+
+@pytest.fixture
+def fake_dnac(monkeypatch):
+    def make(failing_switches=()):
+        fake = FakeDnac(failing_switches)
+        dnac_apis = ibn_provisioning.dnac_apis
+        monkeypatch.setattr(ibn_provisioning.time, 'sleep', lambda seconds: None)
+        monkeypatch.setattr(dnac_apis, 'create_project', lambda *args, **kwargs: 'project')
+        monkeypatch.setattr(dnac_apis, 'create_commit_template', lambda *args, **kwargs: None)
+        monkeypatch.setattr(dnac_apis, 'get_template_id_version', lambda *args, **kwargs: 'template')
+        monkeypatch.setattr(dnac_apis, 'get_device_id_map',
+                            lambda *args, **kwargs: {'SW1': 'id-1', 'SW2': 'id-2', 'SW3': 'id-3'})
+        monkeypatch.setattr(dnac_apis, 'get_task_by_id',
+                            lambda task_id, token, **kwargs: {'id': task_id, 'isError': False, 'endTime': 1})
+        monkeypatch.setattr(dnac_apis, 'deploy_template_id', fake.deploy_template_id)
+        monkeypatch.setattr(dnac_apis, 'check_template_deployment_status', fake.check_template_deployment_status)
+        monkeypatch.setattr(dnac_apis, 'sync_devices', fake.sync_devices)
+        monkeypatch.setattr(ibn_provisioning.ise_apis, 'get_endpoint_group_by_name', fake.get_endpoint_group_by_name)
+        monkeypatch.setattr(ibn_provisioning.ise_apis, 'add_endpoint', fake.add_endpoint)
+        monkeypatch.setattr(ibn_provisioning.task_watcher, 'TaskWatcher',
+                            functools.partial(ibn_provisioning.task_watcher.TaskWatcher, min_interval=0.01))
+        return fake
+    return make
+
+
+class FakeController(object):
+    def __init__(self, name):
+        self.name = name
+        self.dnac_url = 'https://' + name
+        self.ise_url = 'https://ise-' + name
+        self.ise_auth = None
+        self.session = None
+
+    def get_dnac_token(self):
+        return 'token'
+
+
+def make_deployment(switch_name, switchport, mac_address):
+    return {'switchName': switch_name, 'vlan': 100, 'switchport': switchport, 'macAddress': mac_address,
+            'endpointGroup': 'Retail'}
+
+
+def test_deployments_to_one_switch_run_one_after_the_other(fake_dnac):
+    fake = fake_dnac()
+    deployments = [make_deployment('SW' + str(index % 3 + 1), 'GigabitEthernet1/0/' + str(index),
+                                   '00:AA:BB:CC:DD:%02X' % index) for index in range(12)]
+    results = []
+    summary = ibn_provisioning.provision_controller(FakeController('east'), iter(deployments), 'config',
+                                                    max_pending=5, on_result=results.append)
+    assert fake.max_in_progress == 1
+    assert summary == {'deploymentStatus': {'SUCCESS': 12}, 'syncStatus': {'SUCCESS': 12},
+                       'iseStatusCodes': {'201': 12}, 'failures': []}
+    assert [result['deploymentStatus'] for result in results] == ['SUCCESS'] * 12
+    assert [result['syncStatus'] for result in results] == ['SUCCESS'] * 12
+    assert sorted(fake.endpoints) == sorted(deployment['macAddress'] for deployment in deployments)
+    assert fake.endpoint_group_lookups == 1
+    assert sorted(device_id for device_ids in fake.synced for device_id in device_ids) == ['id-1', 'id-2', 'id-3']
+
+
+def test_failed_switch_does_not_stop_the_others(fake_dnac):
+    fake = fake_dnac(failing_switches=['SW2'])
+    deployments = [make_deployment('SW1', 'GigabitEthernet1/0/1', '00:AA:BB:CC:DD:01'),
+                   make_deployment('SW2', 'GigabitEthernet1/0/1', '00:AA:BB:CC:DD:02'),
+                   make_deployment('SW9', 'GigabitEthernet1/0/1', '00:AA:BB:CC:DD:03')]
+    results = []
+    summary = ibn_provisioning.provision_controller(FakeController('east'), deployments, 'config',
+                                                    on_result=results.append)
+    assert [result['switchName'] for result in summary['failures']] == ['SW2', 'SW9']
+    statuses = dict((result['switchName'], (result['deploymentStatus'], result['syncStatus'])) for result in results)
+    assert statuses == {'SW1': ('SUCCESS', 'SUCCESS'), 'SW2': ('ERROR', 'SKIPPED'), 'SW9': ('SUCCESS', 'NOT_FOUND')}
+    assert sorted(fake.endpoints) == ['00:AA:BB:CC:DD:01', '00:AA:BB:CC:DD:03']
+
+
+def test_provision_batch_routes_to_controllers(fake_dnac):
+    fake_dnac()
+    registry = controller_registry.ControllerRegistry(default='east')
+    for name, switches in (('east', ['SW1']), ('west', ['SW2'])):
+        controller = FakeController(name)
+        controller.sites = []
+        controller.switches = switches
+        registry.add(controller)
+    deployments = [make_deployment('SW' + str(index % 2 + 1), 'GigabitEthernet1/0/' + str(index),
+                                   '00:AA:BB:CC:DD:%02X' % index) for index in range(10)]
+    results = []
+    batch_results = ibn_provisioning.provision_batch(iter(deployments), registry, 'config', queue_size=2,
+                                                     on_result=results.append)
+    assert sorted(batch_results) == ['east', 'west']
+    assert [batch_results[name]['deploymentStatus'] for name in ('east', 'west')] == [{'SUCCESS': 5}] * 2
+    assert sorted((result['controller'], result['switchName']) for result in results) == (
+        [('east', 'SW1')] * 5 + [('west', 'SW2')] * 5)
+
+
+def test_ise_failures_reported(fake_dnac, monkeypatch):
+    fake_dnac()
+    monkeypatch.setattr(ibn_provisioning.ise_apis, 'add_endpoint',
+                        lambda mac_address, endpoint_group_id, ise_auth, **kwargs: 500 if mac_address.endswith('2')
+                        else 201)
+    deployment = make_deployment('SW1', 'range GigabitEthernet1/0/1 - 2', '00:AA:BB:CC:DD:01')
+    deployment['intents'] = [make_deployment('SW1', 'GigabitEthernet1/0/1', '00:AA:BB:CC:DD:01'),
+                             make_deployment('SW1', 'GigabitEthernet1/0/2', '00:AA:BB:CC:DD:02')]
+    results = []
+    summary = ibn_provisioning.provision_controller(FakeController('east'), [deployment], 'config',
+                                                    on_result=results.append)
+    assert results[0]['iseStatusCodes'] == {'201': 1, '500': 1}
+    assert results[0]['iseFailures'] == ['00:AA:BB:CC:DD:02']
+    assert 'intents' not in results[0]
+    assert summary['iseStatusCodes'] == {'201': 1, '500': 1}
+    assert summary['failures'] == results
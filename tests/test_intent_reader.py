@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+import intent_reader
+
+
+def make_intent(switch_name='SW1', vlan=100, switchport='Gi1/0/1', mac_address='00:aa:bb:cc:dd:01'):
+    return {'switchName': switch_name, 'vlan': vlan, 'switchport': switchport, 'macAddress': mac_address,
+            'endpointGroup': 'Retail'}
+
+
+@pytest.mark.parametrize('mac_address', ['00:aa:bb:cc:dd:01', '00-AA-BB-CC-DD-01', '00aa.bbcc.dd01', '00aabbccdd01'])
+def test_normalize_mac(mac_address):
+    assert intent_reader.normalize_mac(mac_address) == '00:AA:BB:CC:DD:01'
+
+
+@pytest.mark.parametrize('mac_address', ['00:aa:bb:cc:dd', '00:aa:bb:cc:dd:0g', ''])
+def test_normalize_mac_invalid(mac_address):
+    with pytest.raises(ValueError):
+        intent_reader.normalize_mac(mac_address)
+
+
+@pytest.mark.parametrize('interface_name, normalized', [
+    ('Gi1/0/10', 'GigabitEthernet1/0/10'),
+    ('gi 1/0/10', 'GigabitEthernet1/0/10'),
+    ('GigabitEthernet1/0/10', 'GigabitEthernet1/0/10'),
+    ('Te1/1/1', 'TenGigabitEthernet1/1/1'),
+    ('Twe1/0/1', 'TwentyFiveGigE1/0/1'),
+    ('Fa0/1', 'FastEthernet0/1'),
+])
+def test_normalize_interface(interface_name, normalized):
+    assert intent_reader.normalize_interface(interface_name) == normalized
+
+
+@pytest.mark.parametrize('interface_name', ['Vlan100', 'Gi', 'Gi1/0/1; shutdown'])
+def test_normalize_interface_invalid(interface_name):
+    with pytest.raises(ValueError):
+        intent_reader.normalize_interface(interface_name)
+
+
+@pytest.mark.parametrize('vlan, vlan_id', [(100, 100), ('100', 100), (' 4094 ', 4094)])
+def test_validate_vlan(vlan, vlan_id):
+    assert intent_reader.validate_intent(make_intent(vlan=vlan))['vlan'] == vlan_id
+
+
+@pytest.mark.parametrize('vlan', [True, 100.5, '100.5', '-1', 0, 4095, [100]])
+def test_validate_vlan_invalid(vlan):
+    with pytest.raises(ValueError):
+        intent_reader.validate_intent(make_intent(vlan=vlan))
+
+
+def test_validate_missing_fields():
+    with pytest.raises(ValueError, match='switchport'):
+        intent_reader.validate_intent({'switchName': 'SW1', 'vlan': 100})
+
+
+def test_stream_intents_rejects(tmp_path):
+    records = [
+        make_intent(),
+        make_intent(mac_address='00aa.bbcc.dd01'),  # duplicate
+        make_intent(switch_name='SW2', mac_address='00:aa:bb:cc:dd:01'),  # MAC already assigned
+        make_intent(vlan=200, mac_address='00:aa:bb:cc:dd:02'),  # port already assigned to VLAN 100
+        make_intent(mac_address='00:aa:bb:cc:dd:03'),  # second MAC on the same port and VLAN
+        make_intent(vlan=True, mac_address='00:aa:bb:cc:dd:04'),
+    ]
+    intents_file = tmp_path / 'intents.jsonl'
+    intents_file.write_text('\n'.join(json.dumps(record) for record in records) + '\n{bad\n')
+    rejects = []
+    intents = list(intent_reader.stream_intents(str(intents_file),
+                                                on_reject=lambda number, record, reason: rejects.append(number)))
+    assert [ibn_json['macAddress'] for ibn_json in intents] == ['00:AA:BB:CC:DD:01', '00:AA:BB:CC:DD:03']
+    assert rejects == [2, 3, 4, 6, 7]
+
+
+def test_stream_intents_csv(tmp_path):
+    intents_file = tmp_path / 'intents.csv'
+    intents_file.write_text('switchName,vlan,switchport,macAddress,endpointGroup,location\n'
+                            'SW1,100,gi1/0/4,aa-bb-cc-dd-ee-01,Retail,Branch\n')
+    intents = list(intent_reader.stream_intents(str(intents_file)))
+    assert intents == [{'switchName': 'SW1', 'vlan': 100, 'switchport': 'GigabitEthernet1/0/4',
+                        'macAddress': 'AA:BB:CC:DD:EE:01', 'endpointGroup': 'Retail', 'location': 'Branch'}]
+
+
+def test_stream_intents_csv_with_bom(tmp_path):
+    intents_file = tmp_path / 'intents.csv'
+    intents_file.write_bytes(b'\xef\xbb\xbfswitchName, vlan ,switchport,macAddress,endpointGroup\r\n'
+                             b'SW1,100,gi1/0/4,aa-bb-cc-dd-ee-01,Retail\r\n')
+    rejects = []
+    intents = list(intent_reader.stream_intents(str(intents_file),
+                                                on_reject=lambda number, record, reason: rejects.append(reason)))
+    assert rejects == []
+    assert [(ibn_json['switchName'], ibn_json['vlan']) for ibn_json in intents] == [('SW1', 100)]
+
+
+def test_stream_intents_same_mac_and_port_other_vlan(tmp_path):
+    intents_file = tmp_path / 'intents.jsonl'
+    intents_file.write_text(json.dumps(make_intent()) + '\n' + json.dumps(make_intent(vlan=200)) + '\n')
+    rejects = []
+    intents = list(intent_reader.stream_intents(str(intents_file),
+                                                on_reject=lambda number, record, reason: rejects.append(reason)))
+    assert len(intents) == 1
+    assert rejects == ['Switch port already assigned to VLAN 100']
+
+
+def test_format_interface_range():
+    interfaces = ['GigabitEthernet1/0/3', 'GigabitEthernet1/0/1', 'GigabitEthernet1/0/2', 'GigabitEthernet1/0/7',
+                  'GigabitEthernet2/0/1']
+    assert intent_reader.format_interface_range(interfaces) == [
+        'GigabitEthernet1/0/1 - 3', 'GigabitEthernet1/0/7', 'GigabitEthernet2/0/1']
+
+
+def test_combine_intents():
+    intents = [intent_reader.validate_intent(make_intent(switchport='Gi1/0/' + str(port),
+                                                         mac_address='00:aa:bb:cc:dd:%02x' % port))
+               for port in (1, 2, 3, 5, 7, 9, 11, 13)]
+    deployments = intent_reader.combine_intents(intents)
+    assert [deployment['switchport'] for deployment in deployments] == [
+        'range GigabitEthernet1/0/1 - 3 , GigabitEthernet1/0/5 , GigabitEthernet1/0/7 , GigabitEthernet1/0/9 , '
+        'GigabitEthernet1/0/11',
+        'GigabitEthernet1/0/13']
+    assert sum(len(deployment['intents']) for deployment in deployments) == len(intents)
+
+
+def test_group_intents_flushed_by_total_buffered():
+    intents = [intent_reader.validate_intent(make_intent(switch_name='SW' + str(index),
+                                                         mac_address='00:aa:bb:cc:dd:%02x' % index))
+               for index in range(10)]
+    consumed = []
+
+    def read_intents():
+        for ibn_json in intents:
+            consumed.append(ibn_json)
+            yield ibn_json
+
+    deployments = intent_reader.group_intents_by_switch(read_intents(), max_buffered=3)
+    assert next(deployments)['switchName'] == 'SW0'
+    assert len(consumed) == 4
+    assert [deployment['switchName'] for deployment in deployments] == ['SW' + str(index) for index in range(1, 10)]
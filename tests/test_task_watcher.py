@@ -0,0 +1,139 @@
+import concurrent.futures
+import time
+
+import pytest
+
+import task_watcher
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {'list': 0, 'id': 0, 'deployment': 0}
+    monkeypatch.setattr(task_watcher, 'TASK_LIST_LOOKBACK', 0)
+    return calls
+
+
+def test_tasks_share_one_tick(monkeypatch, calls):
+    done_time = {}
+
+    def get_task_list(start_time, token, offset=1, limit=500, **kwargs):
+        calls['list'] += 1
+        tasks = [{'id': task_id, 'endTime': 1} if time.time() >= end else {'id': task_id}
+                 for task_id, end in done_time.items()]
+        return tasks[offset - 1:offset - 1 + limit]
+
+    def get_task_by_id(task_id, token, **kwargs):
+        calls['id'] += 1
+        return {'id': task_id}
+
+    monkeypatch.setattr(task_watcher.dnac_apis, 'get_task_list', get_task_list)
+    monkeypatch.setattr(task_watcher.dnac_apis, 'get_task_by_id', get_task_by_id)
+    with task_watcher.TaskWatcher('token', min_interval=0.05, max_interval=0.2) as watcher:
+        futures = []
+        for index in range(100):
+            task_id = 'task-' + str(index)
+            done_time[task_id] = time.time() + 0.5
+            futures.append(watcher.watch_task(task_id))
+            time.sleep(0.002)
+        done, not_done = concurrent.futures.wait(futures, timeout=5)
+    assert not not_done
+    assert calls['id'] == 0
+    assert calls['list'] < 30
+
+
+def test_task_list_pages_until_found(monkeypatch, calls):
+    other_tasks = [{'id': 'other-' + str(index), 'endTime': 1} for index in range(25)]
+    watched_tasks = [{'id': 'task-1', 'endTime': 1}, {'id': 'task-2', 'endTime': 1}]
+
+    def get_task_list(start_time, token, offset=1, limit=500, **kwargs):
+        calls['list'] += 1
+        return (other_tasks + watched_tasks)[offset - 1:offset - 1 + limit]
+
+    def get_task_by_id(task_id, token, **kwargs):
+        calls['id'] += 1
+        return {'id': task_id, 'endTime': 1}
+
+    monkeypatch.setattr(task_watcher.dnac_apis, 'get_task_list', get_task_list)
+    monkeypatch.setattr(task_watcher.dnac_apis, 'get_task_by_id', get_task_by_id)
+    with task_watcher.TaskWatcher('token', min_interval=0.01, batch_size=10) as watcher:
+        futures = [watcher.watch_task('task-1'), watcher.watch_task('task-2')]
+        done, not_done = concurrent.futures.wait(futures, timeout=5)
+    assert not not_done
+    assert calls['list'] == 3
+    assert calls['id'] == 0
+
+
+def test_poll_error_is_retried(monkeypatch, calls):
+    def get_task_by_id(task_id, token, **kwargs):
+        calls['id'] += 1
+        if calls['id'] < 3:
+            raise KeyError('response')
+        return {'id': task_id, 'isError': False, 'endTime': 1}
+
+    monkeypatch.setattr(task_watcher.dnac_apis, 'get_task_by_id', get_task_by_id)
+    with task_watcher.TaskWatcher('token', min_interval=0.01, max_errors=3) as watcher:
+        assert watcher.watch_task('task-1').result(timeout=5)['endTime'] == 1
+
+
+def test_future_fails_after_max_errors(monkeypatch, calls):
+    def check_template_deployment_status(depl_task_id, token, **kwargs):
+        calls['deployment'] += 1
+        raise KeyError('status')
+
+    monkeypatch.setattr(task_watcher.dnac_apis, 'check_template_deployment_status', check_template_deployment_status)
+    with task_watcher.TaskWatcher('token', min_interval=0.01, max_errors=3) as watcher:
+        with pytest.raises(KeyError):
+            watcher.watch_deployment('deployment-1').result(timeout=5)
+    assert calls['deployment'] == 3
+
+
+def test_deployment_timeout(monkeypatch, calls):
+    monkeypatch.setattr(task_watcher.dnac_apis, 'check_template_deployment_status',
+                        lambda depl_task_id, token, **kwargs: 'IN_PROGRESS')
+    with task_watcher.TaskWatcher('token', min_interval=0.01, timeout=0.2) as watcher:
+        with pytest.raises(concurrent.futures.TimeoutError):
+            watcher.watch_deployment('deployment-1').result(timeout=5)
+
+
+def test_malformed_task_info_fails_the_future(monkeypatch, calls):
+    def get_task_by_id(task_id, token, **kwargs):
+        calls['id'] += 1
+        return 'Internal Server Error'
+
+    monkeypatch.setattr(task_watcher.dnac_apis, 'get_task_by_id', get_task_by_id)
+    with task_watcher.TaskWatcher('token', min_interval=0.01, max_errors=2) as watcher:
+        with pytest.raises(ValueError):
+            watcher.watch_task('task-1').result(timeout=5)
+        # the polling thread is still running
+        monkeypatch.setattr(task_watcher.dnac_apis, 'get_task_by_id',
+                            lambda task_id, token, **kwargs: {'id': task_id, 'endTime': 1})
+        assert watcher.watch_task('task-2').result(timeout=5)['endTime'] == 1
+    assert calls['id'] == 2
+
+
+def test_malformed_task_list_is_retried(monkeypatch, calls):
+    def get_task_list(start_time, token, offset=1, limit=500, **kwargs):
+        calls['list'] += 1
+        if calls['list'] == 1:
+            return ['not a task']
+        return [{'id': 'task-1', 'endTime': 1}, {'id': 'task-2', 'endTime': 1}]
+
+    monkeypatch.setattr(task_watcher.dnac_apis, 'get_task_list', get_task_list)
+    with task_watcher.TaskWatcher('token', min_interval=0.01) as watcher:
+        futures = [watcher.watch_task('task-1'), watcher.watch_task('task-2')]
+        assert [future.result(timeout=5)['endTime'] for future in futures] == [1, 1]
+
+
+def test_unexpected_poll_error_does_not_stop_the_thread(monkeypatch, calls):
+    monkeypatch.setattr(task_watcher.dnac_apis, 'check_template_deployment_status',
+                        lambda depl_task_id, token, **kwargs: 'SUCCESS')
+
+    def is_deployment_completed(deployment_status):
+        calls['deployment'] += 1
+        if calls['deployment'] == 1:
+            raise RuntimeError('unexpected')
+        return True
+
+    monkeypatch.setattr(task_watcher.dnac_apis, 'is_deployment_completed', is_deployment_completed)
+    with task_watcher.TaskWatcher('token', min_interval=0.01) as watcher:
+        assert watcher.watch_deployment('deployment-1').result(timeout=5) == 'SUCCESS'